@@ -1,4 +1,5 @@
-import json
+import ijson
+import orjson
 import requests
 import pandas as pd
 from datetime import datetime
@@ -6,12 +7,15 @@ from pathlib import Path
 from typing import Dict, Optional
 import logging
 from config.settings import EXCHANGE_API_KEY, EXCHANGE_API_URL, RAW_DIR
+from src.utils.files import atomic_write, latest_file
+from src.utils.http import get_session
 
 logger = logging.getLogger(__name__)
 
 class ExchangeRateExtractor:
     def __init__(self):
         self.api_key = EXCHANGE_API_KEY
+        self.session = get_session()
         self.raw_dir = RAW_DIR / "exchange_rates"
         self.raw_dir.mkdir(parents=True, exist_ok=True)
     
@@ -26,7 +30,7 @@ class ExchangeRateExtractor:
         }
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 EXCHANGE_API_URL,
                 params=params,
                 headers=headers,
@@ -34,7 +38,7 @@ class ExchangeRateExtractor:
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if data.get("success"):
                 logger.info(f"Taxas extraídas com base {base_currency}. Total: {len(data.get('rates', {}))} moedas")
@@ -43,7 +47,7 @@ class ExchangeRateExtractor:
             
             return data
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Erro na API de câmbio: {e}")
             raise
     
@@ -67,34 +71,61 @@ class ExchangeRateExtractor:
             }
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(data_with_metadata, f, indent=2)
+        atomic_write(filepath, orjson.dumps(data_with_metadata, option=orjson.OPT_INDENT_2))
+        
+        compact_data = {
+            "base": data.get("base", base_currency),
+            "date": data.get("date"),
+            "rates": data.get("rates", {})
+        }
+        atomic_write(self._compact_rate_path(base_currency), orjson.dumps(compact_data))
         
         logger.info(f"Dados salvos em: {filepath}")
         return str(filepath)
     
+    def _compact_rate_path(self, base_currency: str) -> Path:
+        """Caminho do arquivo compacto com as taxas mais recentes da base"""
+        return self.raw_dir / f"latest_{base_currency}.json"
+    
+    def get_compact_rate_file(self, base_currency: str) -> Optional[Path]:
+        """Obtém o arquivo compacto mais recente da base, se existir"""
+        filepath = self._compact_rate_path(base_currency)
+        return filepath if filepath.exists() else None
+    
     def get_latest_rate_file(self) -> Optional[Path]:
         """Obtém o arquivo mais recente"""
-        json_files = list(self.raw_dir.glob("*.json"))
-        if not json_files:
-            return None
-        return max(json_files, key=lambda x: x.stat().st_mtime)
+        return latest_file(self.raw_dir, prefix="exchange_rates_")
     
     def get_rate_from_file(self, base_currency: str, target_currency: str, 
                           filepath: Optional[Path] = None) -> Optional[float]:
         """Obtém taxa específica de um arquivo JSON"""
         if filepath is None:
-            filepath = self.get_latest_rate_file()
+            filepath = self.get_compact_rate_file(base_currency) or self.get_latest_rate_file()
         
         if filepath is None:
             return None
         
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        file_base = None
+        wanted = {base_currency, target_currency}
+        rates = {}
         
-        rates = data.get("rates", {})
+        with open(filepath, 'rb') as f:
+            for prefix, event, value in ijson.parse(f):
+                if prefix == "base" and event == "string":
+                    file_base = value
+                elif prefix.startswith("rates.") and event == "number":
+                    currency = prefix[len("rates."):]
+                    if currency in wanted:
+                        rates[currency] = float(value)
+                
+                if file_base is not None:
+                    if file_base == base_currency and target_currency in rates:
+                        break
+                    if wanted <= rates.keys():
+                        break
         
-        file_base = data.get("base", "EUR")
+        if file_base is None:
+            file_base = "EUR"
         
         if file_base == base_currency:
             return rates.get(target_currency)
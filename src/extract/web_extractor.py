@@ -1,18 +1,22 @@
 import requests
+import lxml.html
 import pandas as pd
 from io import StringIO
-import json
+import orjson
 from datetime import datetime
 from pathlib import Path
 import logging
 from typing import Optional  
 from config.settings import BANKS_WIKI_URL, RAW_DIR
+from src.utils.files import atomic_write, latest_file
+from src.utils.http import get_session
 
 logger = logging.getLogger(__name__)
 
 class BanksExtractor:
     def __init__(self):
         self.url = BANKS_WIKI_URL
+        self.session = get_session()
         self.raw_dir = RAW_DIR / "banks"
         self.raw_dir.mkdir(parents=True, exist_ok=True)
     
@@ -23,13 +27,16 @@ class BanksExtractor:
         }
         
         try:
-            response = requests.get(self.url, headers=headers, timeout=15)
+            response = self.session.get(self.url, headers=headers, timeout=15)
             response.raise_for_status()
             
-            html_io = StringIO(response.text)
-            tables = pd.read_html(html_io)
+            tree = lxml.html.fromstring(response.content)
+            tables = tree.xpath('//table[contains(@class, "wikitable")]')
+            if not tables:
+                raise ValueError("Nenhuma tabela wikitable encontrada na página")
             
-            df = tables[0].copy()
+            table_html = lxml.html.tostring(tables[0], encoding='unicode')
+            df = pd.read_html(StringIO(table_html), flavor='lxml')[0]
             df['_extracted_at'] = datetime.now()
             
             logger.info(f"Extraídas {len(df)} linhas da Wikipedia")
@@ -45,8 +52,15 @@ class BanksExtractor:
         filename = f"banks_wikipedia_{timestamp}.json"
         filepath = self.raw_dir / filename
         
+        records_json = df.to_json(
+            orient='records',
+            date_format='iso',
+            date_unit='us',
+            default_handler=str
+        )
+        
         data = {
-            "data": df.to_dict(orient='records'),
+            "data": orjson.Fragment(records_json.encode()),
             "_metadata": {
                 "timestamp": timestamp,
                 "source": "wikipedia.org",
@@ -55,18 +69,14 @@ class BanksExtractor:
             }
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        atomic_write(filepath, orjson.dumps(data, option=orjson.OPT_INDENT_2, default=str))
         
         logger.info(f"Dados dos bancos salvos em: {filepath}")
         return str(filepath)
     
     def get_latest_banks_file(self) -> Optional[Path]:
         """Obtém o arquivo mais recente"""
-        json_files = list(self.raw_dir.glob("*.json"))
-        if not json_files:
-            return None
-        return max(json_files, key=lambda x: x.stat().st_mtime)
+        return latest_file(self.raw_dir, prefix="banks_wikipedia_")
 
 def extract_and_save_banks() -> pd.DataFrame:
     """Função principal de extração"""
@@ -1,10 +1,14 @@
+import numpy as np
 import pandas as pd
-import json
+import orjson
+import pickle
+import shutil
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 import logging
 from config.settings import PROCESSED_DIR
+from src.utils.files import WRITE_BUFFER_SIZE, atomic_open, atomic_write
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +21,54 @@ class IncrementalCSVLoader:
     def _load_history(self) -> dict:
         """Carrega histórico de cargas"""
         if self.history_file.exists():
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
+            with open(self.history_file, 'rb') as f:
+                return orjson.loads(f.read())
         return {"loads": []}
     
     def _save_history(self, history: dict):
         """Salva histórico de cargas"""
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+        atomic_write(self.history_file, orjson.dumps(history, option=orjson.OPT_INDENT_2))
+    
+    def _key_column(self, df: pd.DataFrame) -> str:
+        """Coluna usada para deduplicar registros"""
+        return 'Bank name' if 'Bank name' in df.columns else df.columns[0]
+    
+    def _keys_index_file(self, daily_file: Path) -> Path:
+        """Caminho do índice de chaves do arquivo diário"""
+        return daily_file.with_name(f"{daily_file.stem}_keys.pkl")
+    
+    def _load_keys_index(self, daily_file: Path, key_column: str) -> dict:
+        """Carrega índice das chaves já gravadas no arquivo diário
+        
+        O índice guarda o tamanho do arquivo diário no momento em que foi salvo;
+        se o CSV mudou desde então (falha entre append e índice, edição manual),
+        as chaves são relidas do CSV.
+        """
+        if not daily_file.exists():
+            return {"keys": set(), "rows": 0, "size": 0}
+        
+        daily_size = daily_file.stat().st_size
+        index_file = self._keys_index_file(daily_file)
+        if index_file.exists():
+            with open(index_file, 'rb') as f:
+                keys_index = pickle.load(f)
+            if keys_index.get("size") == daily_size:
+                return keys_index
+            logger.warning(f"Índice de chaves desatualizado para {daily_file.name}; relendo CSV")
+        
+        existing_df = pd.read_csv(daily_file)
+        return {
+            "keys": set(existing_df[key_column].astype(str)),
+            "rows": len(existing_df),
+            "size": daily_size
+        }
+    
+    def _save_keys_index(self, daily_file: Path, keys_index: dict):
+        """Salva índice de chaves do arquivo diário"""
+        atomic_write(
+            self._keys_index_file(daily_file),
+            pickle.dumps(keys_index, protocol=pickle.HIGHEST_PROTOCOL)
+        )
     
     def load_incremental(self, df: pd.DataFrame, filename: str = "bank_market_cap_gbp") -> str:
         """Carrega dados incrementalmente mantendo histórico"""
@@ -35,28 +79,38 @@ class IncrementalCSVLoader:
         
         timestamped_file = self.output_dir / f"{filename}_{timestamp}.csv"
         
-        if daily_file.exists():
-            existing_df = pd.read_csv(daily_file)
-            
-            key_column = 'Bank name' if 'Bank name' in df.columns else df.columns[0]
-            
-            existing_keys = set(existing_df[key_column].astype(str))
-            new_records = df[~df[key_column].astype(str).isin(existing_keys)]
-            
-            if not new_records.empty:
-                updated_df = pd.concat([existing_df, new_records], ignore_index=True)
-                updated_df.to_csv(daily_file, index=False)
-                
-                logger.info(f"Adicionadas {len(new_records)} novas linhas ao arquivo diário")
-            else:
-                updated_df = existing_df
-                logger.info("Nenhum novo registro para adicionar")
+        key_column = self._key_column(df)
+        keys_index = self._load_keys_index(daily_file, key_column)
+        key_values = df[key_column].astype(str)
+        is_new = ~key_values.isin(keys_index["keys"]).to_numpy()
+        new_records = df[is_new]
+        new_keys = key_values.to_numpy(dtype=object)[is_new]
+        
+        # O consolidado é atualizado antes de marcar as chaves como gravadas:
+        # se falhar, a próxima execução ainda vê esses registros como novos.
+        if not new_records.empty:
+            self._update_consolidated(new_records, filename, key_column, new_keys)
+        
+        if not daily_file.exists():
+            with atomic_open(daily_file, 'w', newline='', encoding='utf-8') as f:
+                new_records.to_csv(f, index=False)
+            logger.info(f"Criado novo arquivo diário com {len(new_records)} linhas")
+        elif not new_records.empty:
+            header = pd.read_csv(daily_file, nrows=0).columns
+            new_records.reindex(columns=header).to_csv(
+                daily_file, mode='a', header=False, index=False
+            )
+            logger.info(f"Adicionadas {len(new_records)} novas linhas ao arquivo diário")
         else:
-            df.to_csv(daily_file, index=False)
-            updated_df = df
-            logger.info(f"Criado novo arquivo diário com {len(df)} linhas")
+            logger.info("Nenhum novo registro para adicionar")
+        
+        keys_index["keys"].update(new_keys)
+        keys_index["rows"] += len(new_records)
+        keys_index["size"] = daily_file.stat().st_size
+        self._save_keys_index(daily_file, keys_index)
         
-        updated_df.to_csv(timestamped_file, index=False)
+        with open(daily_file, 'rb') as src, atomic_open(timestamped_file, 'wb') as dst:
+            shutil.copyfileobj(src, dst, WRITE_BUFFER_SIZE)
         
         history = self._load_history()
         history["loads"].append({
@@ -64,30 +118,54 @@ class IncrementalCSVLoader:
             "date": date_str,
             "file": str(timestamped_file.name),
             "daily_file": str(daily_file.name),
-            "rows_loaded": len(updated_df),
-            "new_rows": len(df) if not daily_file.exists() else len(new_records) if 'new_records' in locals() else 0
+            "rows_loaded": keys_index["rows"],
+            "new_rows": len(new_records)
         })
         self._save_history(history)
         
-        self._update_consolidated(updated_df, filename)
-        
         return str(timestamped_file)
     
-    def _update_consolidated(self, df: pd.DataFrame, filename: str):
-        """Atualiza arquivo consolidado com todos os dados"""
-        consolidated_file = self.output_dir / f"{filename}_consolidated.csv"
+    def _categorize_strings(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Converte colunas de texto repetitivo para category
+        
+        Colunas object podem misturar tipos entre snapshots (ex.: float em um
+        dia, '5,560.00[2]' no outro); os valores são normalizados para str,
+        mantendo nulos, para que o Parquet receba um único tipo por coluna.
+        """
+        string_columns = df.select_dtypes(include='object').columns
+        if string_columns.empty:
+            return df
+        
+        df = df.copy(deep=False)
+        for col in string_columns:
+            values = df[col]
+            df[col] = values.where(values.isna(), values.astype(str)).astype('category')
+        return df
+    
+    def _update_consolidated(self, df: pd.DataFrame, filename: str,
+                             key_column: str, new_keys: np.ndarray):
+        """Atualiza arquivo consolidado (Parquet) com todos os dados"""
+        consolidated_file = self.output_dir / f"{filename}_consolidated.parquet"
+        legacy_file = self.output_dir / f"{filename}_consolidated.csv"
         
         if consolidated_file.exists():
-            consolidated_df = pd.read_csv(consolidated_file)
-            key_column = 'Bank name' if 'Bank name' in df.columns else df.columns[0]
-            consolidated_df = consolidated_df[
-                ~consolidated_df[key_column].astype(str).isin(df[key_column].astype(str))
-            ]
+            consolidated_df = pd.read_parquet(consolidated_file)
+        elif legacy_file.exists():
+            consolidated_df = pd.read_csv(legacy_file)
+            logger.info(f"Migrando consolidado CSV para Parquet: {legacy_file.name}")
+        else:
+            consolidated_df = None
+        
+        if consolidated_df is not None:
+            existing_keys = consolidated_df[key_column].astype(str).to_numpy(dtype=object)
+            consolidated_df = consolidated_df[~np.isin(existing_keys, new_keys)]
             final_df = pd.concat([consolidated_df, df], ignore_index=True)
         else:
             final_df = df
         
-        final_df.to_csv(consolidated_file, index=False)
+        final_df = self._categorize_strings(final_df)
+        with atomic_open(consolidated_file, 'wb') as f:
+            final_df.to_parquet(f, compression='zstd', index=False)
         logger.info(f"Arquivo consolidado atualizado: {len(final_df)} linhas")
     
     def get_load_stats(self) -> dict:
@@ -1,18 +1,18 @@
 import logging
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
 from src.extract.api_extractor import extract_and_save_exchange_rate
 from src.extract.web_extractor import extract_and_save_banks
-from src.transform.market_cap_transformer import transform_market_cap_to_currency
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f"logs/etl_{datetime.now().strftime('%Y%m%d')}.log"),
-        logging.StreamHandler()
-    ]
+from src.transform.market_cap_transformer import (
+    select_target_currency,
+    transform_market_cap_to_currencies,
+    transform_market_cap_to_currency
 )
+from src.load.file_loader import load_to_csv
+from src.utils.logger import configure_logging
+from src.utils.http import reset_session
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +43,6 @@ def run_etl_pipeline(
         )
         
         logger.info("Fase 3: Carga de dados")
-        from src.load.file_loader import load_to_csv
         output_file = load_to_csv(transformed_df, f"bank_market_cap_{target_currency.lower()}")
         
         logger.info(f"Pipeline concluído com sucesso!")
@@ -57,7 +56,72 @@ def run_etl_pipeline(
         logger.error(f"ERRO no pipeline ETL: {e}", exc_info=True)
         raise
 
+def _init_worker(log_level: Optional[int]) -> None:
+    """Inicializa o worker: sessão HTTP própria e logging só se o pai o configurou"""
+    reset_session()
+    if log_level is not None:
+        configure_logging(log_level)
+
+def _extract_and_transform(base_currency: str, target_currencies: List[str]) -> pd.DataFrame:
+    """Extrai as taxas de uma base e converte para todos os destinos (executa em subprocesso)"""
+    logger.info(f"Extraindo taxas de câmbio (base: {base_currency})...")
+    extract_and_save_exchange_rate(base_currency)
+    
+    logger.info(f"Convertendo {base_currency} para {', '.join(target_currencies)}...")
+    return transform_market_cap_to_currencies(base_currency, target_currencies)
+
+def run_multi_currency_pipeline(
+    conversions: List[Tuple[str, str]],
+    max_workers: int = 4
+) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """Executa o pipeline para vários pares (base, destino), extraindo e limpando uma vez por base
+    
+    Cada base é extraída/transformada em um processo separado; a carga fica no
+    processo principal porque todas as conversões escrevem no mesmo histórico.
+    """
+    targets_by_base: Dict[str, List[str]] = {}
+    for base_currency, target_currency in conversions:
+        targets_by_base.setdefault(base_currency, []).append(target_currency)
+    
+    logger.info("=" * 50)
+    logger.info(f"INICIANDO PIPELINE ETL MULTI-MOEDA: {len(conversions)} conversões")
+    logger.info("=" * 50)
+    
+    try:
+        logger.info("Fase 1: Extração de dados")
+        logger.info("Extraindo dados dos bancos da Wikipedia...")
+        extract_and_save_banks()
+        
+        logger.info("Fase 2: Extração de taxas e transformação por base")
+        workers = max(1, min(max_workers, len(targets_by_base)))
+        root_logger = logging.getLogger()
+        log_level = root_logger.level if root_logger.hasHandlers() else None
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(log_level,)
+        ) as executor:
+            futures = {
+                base_currency: executor.submit(_extract_and_transform, base_currency, target_currencies)
+                for base_currency, target_currencies in targets_by_base.items()
+            }
+            transformed = {base_currency: future.result() for base_currency, future in futures.items()}
+        
+        logger.info("Fase 3: Carga de dados")
+        results = {}
+        for base_currency, target_currency in conversions:
+            target_df = select_target_currency(transformed[base_currency], target_currency)
+            output_file = load_to_csv(target_df, f"bank_market_cap_{target_currency.lower()}")
+            logger.info(f"Arquivo gerado: {output_file}")
+            results[(base_currency, target_currency)] = target_df
+        
+        logger.info("Pipeline multi-moeda concluído com sucesso!")
+        return results
+        
+    except Exception as e:
+        logger.error(f"ERRO no pipeline ETL: {e}", exc_info=True)
+        raise
+
 if __name__ == "__main__":
+    configure_logging()
     run_etl_pipeline("USD", "GBP")  # USD para GBP
     
     # run_etl_pipeline("USD", "EUR")  # USD para Euro
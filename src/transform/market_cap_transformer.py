@@ -1,9 +1,11 @@
+import numpy as np
 import pandas as pd
-import json
+import orjson
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 import logging
 from datetime import datetime
+from functools import lru_cache
 import re
 from src.extract.web_extractor import BanksExtractor
 from src.extract.api_extractor import ExchangeRateExtractor
@@ -11,143 +13,243 @@ from config.settings import PROCESSED_DIR
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=4)
+def _load_json_cached(path: str, mtime_ns: int) -> dict:
+    """Lê e decodifica um JSON; cache invalidado quando o arquivo muda"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+def _load_json(filepath: Path) -> dict:
+    """Carrega JSON reaproveitando o parse entre conversões (não modificar o retorno)"""
+    return _load_json_cached(str(filepath), filepath.stat().st_mtime_ns)
+
+@lru_cache(maxsize=64)
+def _compute_rate(base_currency: str, target_currency: str, filepath: str, mtime_ns: int) -> float:
+    """Deriva a taxa base->destino de um arquivo de câmbio (cache por arquivo/mtime)"""
+    data = _load_json(Path(filepath))
+    
+    rates = data.get("rates", {})
+    file_base = data.get("base", "EUR")
+    
+    logger.info("Arquivo base: %s, Procurando: %s->%s", file_base, base_currency, target_currency)
+    
+    if file_base == base_currency:
+        rate = rates.get(target_currency)
+        if rate:
+            logger.info("Taxa direta encontrada: %s", rate)
+            return rate
+    
+    base_rate = rates.get(base_currency)  
+    target_rate = rates.get(target_currency)  
+    
+    if base_rate and target_rate and base_rate != 0:
+        calculated_rate = target_rate / base_rate
+        logger.info("Taxa calculada: %s->%s = %s", base_currency, target_currency, calculated_rate)
+        logger.info("  (EUR->%s: %s, EUR->%s: %s)", base_currency, base_rate, target_currency, target_rate)
+        return calculated_rate
+    
+    logger.error(f"Não foi possível obter taxa {base_currency}->{target_currency}")
+    logger.error(f"Moedas disponíveis no arquivo: {list(rates.keys())}")
+    
+    raise ValueError(f"Taxa {base_currency}->{target_currency} não encontrada")
+
+@lru_cache(maxsize=16)
+def _resolve_market_cap_column(columns: Tuple, candidates: Tuple[str, ...]) -> Optional[str]:
+    """Primeira coluna candidata presente no layout (cache por tupla de colunas)"""
+    available = set(columns)
+    for col in candidates:
+        if col in available:
+            return col
+    return None
+
+def _constant_category(value: str, length: int) -> pd.Categorical:
+    """Coluna constante como Categorical (1 byte por linha em vez de um ponteiro)"""
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
+
 class MarketCapTransformer:
+    _NUMERIC_STRIP = re.compile(r'[^\d\.,\-]')
+    _FLOAT_OK = re.compile(r'-?(?:\d+(?:\.\d*)?|\.\d+)')
+    _TARGET_COLUMNS: Tuple[str, ...] = (
+        'Total assets (2025) (US$ billion)',
+        'Market capitalization(US$ billion)',
+        'Market cap (US$ billion)',
+        'market_cap_usd_billion',
+        'Total assets',
+        'Assets'
+    )
+    
     def __init__(self, base_currency: str = "USD", target_currency: str = "GBP"):
         self.base_currency = base_currency
         self.target_currency = target_currency
         self.processed_dir = PROCESSED_DIR
         self.processed_dir.mkdir(parents=True, exist_ok=True)
     
-    def _get_exchange_rate(self) -> float:
+    def _get_exchange_rate(self, target_currency: Optional[str] = None) -> float:
         """Obtém taxa de câmbio específica dos dados extraídos"""
+        target_currency = target_currency or self.target_currency
+        if target_currency == self.base_currency:
+            return 1.0
+        
         extractor = ExchangeRateExtractor()
-        filepath = extractor.get_latest_rate_file()
+        filepath = (
+            extractor.get_compact_rate_file(self.base_currency)
+            or extractor.get_latest_rate_file()
+        )
         
         if filepath is None:
             raise FileNotFoundError("Nenhum arquivo de taxa de câmbio encontrado")
         
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-        
-        rates = data.get("rates", {})
-        file_base = data.get("base", "EUR")
-        
-        logger.info(f"Arquivo base: {file_base}, Procurando: {self.base_currency}->{self.target_currency}")
-        
-        if file_base == self.base_currency:
-            rate = rates.get(self.target_currency)
-            if rate:
-                logger.info(f"Taxa direta encontrada: {rate}")
-                return rate
-        
-        base_rate = rates.get(self.base_currency)  
-        target_rate = rates.get(self.target_currency)  
-        
-        if base_rate and target_rate and base_rate != 0:
-            calculated_rate = target_rate / base_rate
-            logger.info(f"Taxa calculada: {self.base_currency}->{self.target_currency} = {calculated_rate}")
-            logger.info(f"  (EUR->{self.base_currency}: {base_rate}, EUR->{self.target_currency}: {target_rate})")
-            return calculated_rate
-        
-        rate = extractor.get_rate_from_file(self.base_currency, self.target_currency, filepath)
-        if rate:
-            return rate
-        
-        logger.error(f"Não foi possível obter taxa {self.base_currency}->{self.target_currency}")
-        logger.error(f"Moedas disponíveis no arquivo: {list(rates.keys())}")
-        
-        raise ValueError(f"Taxa {self.base_currency}->{self.target_currency} não encontrada")
+        return _compute_rate(
+            self.base_currency,
+            target_currency,
+            str(filepath),
+            filepath.stat().st_mtime_ns
+        )
     
     def _find_market_cap_column(self, df: pd.DataFrame) -> str:
         """Encontra a coluna de market cap/assets"""
-        target_columns = [
-            'Total assets (2025) (US$ billion)',
-            'Market capitalization(US$ billion)',
-            'Market cap (US$ billion)',
-            'market_cap_usd_billion',
-            'Total assets',
-            'Assets'
-        ]
-        
-        for col in target_columns:
-            if col in df.columns:
-                logger.info(f"Coluna encontrada: {col}")
-                return col
+        col = _resolve_market_cap_column(tuple(df.columns), self._TARGET_COLUMNS)
+        if col is not None:
+            logger.info("Coluna encontrada: %s", col)
+            return col
         
         raise ValueError(f"Nenhuma coluna de market cap encontrada. Colunas: {list(df.columns)}")
     
-    def _clean_numeric_value(self, value) -> float:
-        """Converte qualquer valor para float"""
-        if pd.isna(value):
-            return 0.0
+    def _clean_numeric_series(self, values: pd.Series) -> pd.Series:
+        """Converte uma coluna inteira para float (vetorizado)"""
+        numeric = pd.to_numeric(values, errors='coerce')
+        dirty = numeric.isna() & values.notna()
+        if values.dtype == object:
+            # to_numeric aceita 'inf' e notação científica ('1e5'), mas a limpeza
+            # remove as letras (-> 0.0 e 15.0); esses textos vão pelo caminho lento
+            is_text = values.map(type).eq(str)
+            dirty |= is_text & values.where(is_text, '').str.contains('[A-Za-z]', regex=True)
         
-        try:
-            if isinstance(value, (int, float)):
-                return float(value)
-            
-            str_value = str(value).strip()
-            str_value = re.sub(r'[^\d\.\,\-]', '', str_value)
+        if dirty.any():
+            str_values = values[dirty].astype(str).str.strip()
+            str_values = str_values.str.replace(self._NUMERIC_STRIP, '', regex=True)
             
-            if ',' in str_value and '.' not in str_value:
-                str_value = str_value.replace(',', '.')
+            comma_decimal = (
+                str_values.str.contains(',', regex=False)
+                & ~str_values.str.contains('.', regex=False)
+            )
+            str_values = str_values.mask(comma_decimal, str_values.str.replace(',', '.', regex=False))
+            str_values = str_values.str.replace(',', '', regex=False)
             
-            str_value = str_value.replace(',', '')
+            valid = str_values.str.fullmatch(self._FLOAT_OK)
+            cleaned = str_values.where(valid).astype('float64')
             
-            if not str_value or str_value == '-':
-                return 0.0
+            invalid = ~valid & ~str_values.isin(['', '-'])
+            if invalid.any():
+                logger.warning(f"{int(invalid.sum())} valores não convertidos (usando 0.0): "
+                               f"{values[dirty][invalid].head(5).tolist()}")
             
-            return float(str_value)
-            
-        except Exception as e:
-            logger.warning(f"Erro ao converter valor '{value}': {e}")
-            return 0.0
+            numeric = numeric.mask(dirty, cleaned)
+        
+        return numeric.fillna(0.0).astype('float64')
     
-    def load_latest_data(self) -> Tuple[pd.DataFrame, float]:
-        """Carrega dados mais recentes"""
+    def _load_banks_data(self) -> pd.DataFrame:
+        """Carrega o arquivo de bancos mais recente"""
         banks_extractor = BanksExtractor()
         banks_file = banks_extractor.get_latest_banks_file()
         
         if not banks_file:
             raise FileNotFoundError("Nenhum arquivo de bancos encontrado")
         
-        with open(banks_file, 'r') as f:
-            banks_data = json.load(f)
+        banks_data = _load_json(banks_file)
         
-        banks_df = pd.DataFrame(banks_data["data"])
-        logger.info(f"Carregados {len(banks_df)} bancos")
+        records = banks_data["data"]
+        columns = banks_data.get("_metadata", {}).get("columns")
+        if not (records and columns and list(records[0]) == columns):
+            columns = None
+        
+        banks_df = pd.DataFrame(records, columns=columns)
+        logger.info("Carregados %d bancos", len(banks_df))
+        
+        return banks_df
+    
+    def load_latest_data(self) -> Tuple[pd.DataFrame, float]:
+        """Carrega dados mais recentes"""
+        banks_df = self._load_banks_data()
         
         exchange_rate = self._get_exchange_rate()
-        logger.info(f"Taxa {self.base_currency}->{self.target_currency}: {exchange_rate}")
+        logger.info("Taxa %s->%s: %s", self.base_currency, self.target_currency, exchange_rate)
         
         return banks_df, exchange_rate
     
     def transform(self) -> pd.DataFrame:
         """Transforma assets/market cap para moeda destino"""
-        banks_df, exchange_rate = self.load_latest_data()
-        
-        df = banks_df.copy()
+        df, exchange_rate = self.load_latest_data()
         
         asset_column = self._find_market_cap_column(df)
         
-        df['assets_usd_billion'] = df[asset_column].apply(self._clean_numeric_value)
+        df['assets_usd_billion'] = self._clean_numeric_series(df[asset_column])
         
         target_col = f'assets_{self.target_currency.lower()}_billion'
-        df[target_col] = (df['assets_usd_billion'] * exchange_rate).round(3)
+        assets = df['assets_usd_billion'].to_numpy(dtype=np.float64, copy=False)
+        if exchange_rate != 1.0:
+            converted = np.multiply(assets, exchange_rate)
+            df[target_col] = np.round(converted, 3, out=converted)
+        else:
+            df[target_col] = np.round(assets, 3)
         
         df['_transformed_at'] = datetime.now()
         df['_exchange_rate'] = exchange_rate
-        df['_exchange_from'] = self.base_currency
-        df['_exchange_to'] = self.target_currency
-        df['_exchange_date'] = datetime.now().strftime("%Y-%m-%d")
+        df['_exchange_from'] = _constant_category(self.base_currency, len(df))
+        df['_exchange_to'] = _constant_category(self.target_currency, len(df))
+        df['_exchange_date'] = _constant_category(datetime.now().strftime("%Y-%m-%d"), len(df))
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Exemplo de conversão:")
+            sample_size = min(3, len(df))
+            if 'Bank name' in df.columns:
+                bank_names = df['Bank name'].to_numpy()[:sample_size]
+            else:
+                bank_names = [f"Bank_{idx}" for idx in df.index[:sample_size]]
+            base_values = df['assets_usd_billion'].to_numpy()[:sample_size]
+            target_values = df[target_col].to_numpy()[:sample_size]
+            
+            for bank_name, base_value, target_value in zip(bank_names, base_values, target_values):
+                logger.info("  %s: %s %sB → %s %sB", bank_name,
+                            self.base_currency, base_value, self.target_currency, target_value)
+        
+        logger.info("Transformação concluída. Total: %d registros", len(df))
         
-        logger.info("Exemplo de conversão:")
-        for idx, row in df.head(3).iterrows():
-            bank_name = row.get('Bank name', f"Bank_{idx}")
-            logger.info(f"  {bank_name}: "
-                       f"{self.base_currency} {row['assets_usd_billion']}B → "
-                       f"{self.target_currency} {row[target_col]}B")
+        return df
+    
+    def transform_many(self, target_currencies: List[str]) -> pd.DataFrame:
+        """Transforma assets para várias moedas destino com uma única carga/limpeza
         
-        logger.info(f"Transformação concluída. Total: {len(df)} registros")
+        As taxas usadas ficam em df.attrs['exchange_rates'] ({moeda: taxa});
+        use select_target_currency() para obter o layout de transform().
+        A coluna assets_usd_billion mantém os valores de origem, mesmo com USD
+        entre os destinos.
+        """
+        df = self._load_banks_data()
+        
+        asset_column = self._find_market_cap_column(df)
+        df['assets_usd_billion'] = self._clean_numeric_series(df[asset_column])
+        
+        rates = np.array(
+            [self._get_exchange_rate(target) for target in target_currencies],
+            dtype=np.float64
+        )
+        assets = df['assets_usd_billion'].to_numpy(dtype=np.float64, copy=False)
+        converted = np.outer(assets, rates)
+        np.round(converted, 3, out=converted)
+        
+        for i, target in enumerate(target_currencies):
+            target_col = f'assets_{target.lower()}_billion'
+            if target_col != 'assets_usd_billion':
+                df[target_col] = converted[:, i]
+        
+        df['_transformed_at'] = datetime.now()
+        df['_exchange_from'] = _constant_category(self.base_currency, len(df))
+        df['_exchange_date'] = _constant_category(datetime.now().strftime("%Y-%m-%d"), len(df))
+        df.attrs['exchange_rates'] = dict(zip(target_currencies, rates.tolist()))
+        
+        logger.info("Transformação concluída para %s. Total: %d registros",
+                    ", ".join(target_currencies), len(df))
         
         return df
 
@@ -159,6 +261,36 @@ def transform_market_cap_to_currency(
     transformer = MarketCapTransformer(base_currency, target_currency)
     return transformer.transform()
 
+def transform_market_cap_to_currencies(
+    base_currency: str,
+    target_currencies: List[str]
+) -> pd.DataFrame:
+    """Converte para várias moedas destino a partir da mesma base"""
+    transformer = MarketCapTransformer(base_currency, target_currencies[0])
+    return transformer.transform_many(target_currencies)
+
+def select_target_currency(df: pd.DataFrame, target_currency: str) -> pd.DataFrame:
+    """Extrai de um resultado de transform_many() o DataFrame de uma moeda"""
+    rates = df.attrs['exchange_rates']
+    other_columns = [
+        f'assets_{target.lower()}_billion' for target in rates
+        if target != target_currency and target.lower() != 'usd'
+    ]
+    
+    target_df = df.drop(columns=other_columns)
+    exchange_rate = rates[target_currency]
+    if target_currency.lower() == 'usd':
+        assets = target_df['assets_usd_billion'].to_numpy(dtype=np.float64)
+        converted = np.multiply(assets, exchange_rate)
+        target_df['assets_usd_billion'] = np.round(converted, 3, out=converted)
+    target_df.insert(target_df.columns.get_loc('_exchange_from'), '_exchange_rate', exchange_rate)
+    target_df.insert(
+        target_df.columns.get_loc('_exchange_date'),
+        '_exchange_to',
+        _constant_category(target_currency, len(target_df))
+    )
+    return target_df
+
 def transform_market_cap_to_gbp() -> pd.DataFrame:
     """Função antiga para compatibilidade (USD->GBP padrão)"""
     return transform_market_cap_to_currency("USD", "GBP")
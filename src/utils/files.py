@@ -0,0 +1,50 @@
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+WRITE_BUFFER_SIZE = 1 << 20
+
+@lru_cache(maxsize=32)
+def _scan_latest(directory: str, prefix: str, suffix: str, dir_mtime_ns: int) -> Optional[str]:
+    """Varre o diretório uma vez por versão (mtime) e devolve o arquivo mais recente"""
+    latest_path = None
+    latest_mtime = -1
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith(prefix) or not entry.name.endswith(suffix):
+                continue
+            if not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime_ns
+            if mtime > latest_mtime:
+                latest_path, latest_mtime = entry.path, mtime
+    return latest_path
+
+def latest_file(directory: Path, prefix: str = "", suffix: str = ".json") -> Optional[Path]:
+    """Obtém o arquivo mais recente do diretório (cache invalidado pelo mtime do diretório)"""
+    dir_mtime_ns = directory.stat().st_mtime_ns
+    path = _scan_latest(str(directory), prefix, suffix, dir_mtime_ns)
+    return Path(path) if path else None
+
+@contextmanager
+def atomic_open(path: Path, mode: str = 'wb', **kwargs) -> Iterator[IO]:
+    """Escreve em arquivo temporário e substitui o destino com os.replace ao final"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    kwargs.setdefault('buffering', WRITE_BUFFER_SIZE)
+    if 'b' not in mode:
+        kwargs.setdefault('encoding', 'utf-8')
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+def atomic_write(path: Path, data: bytes):
+    """Grava bytes de forma atômica"""
+    with atomic_open(path, 'wb') as f:
+        f.write(data)
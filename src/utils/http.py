@@ -0,0 +1,31 @@
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session: Optional[requests.Session] = None
+
+def get_session() -> requests.Session:
+    """Retorna sessão HTTP compartilhada (keep-alive + retry)"""
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504]
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=4,
+            pool_maxsize=4
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+def reset_session() -> None:
+    """Descarta a sessão compartilhada sem fechá-la (uso em processos filhos após fork)"""
+    global _session
+    _session = None
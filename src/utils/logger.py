@@ -0,0 +1,21 @@
+import logging
+from datetime import datetime
+from config.settings import BASE_DIR
+
+LOGS_DIR = BASE_DIR / "logs"
+
+def configure_logging(level: int = logging.INFO):
+    """Configura logging do pipeline (arquivo diário + console), uma única vez"""
+    root_logger = logging.getLogger()
+    if root_logger.hasHandlers():
+        return
+    
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOGS_DIR / f"etl_{datetime.now().strftime('%Y%m%d')}.log"),
+            logging.StreamHandler()
+        ]
+    )
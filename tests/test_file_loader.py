@@ -0,0 +1,91 @@
+import numpy as np
+import orjson
+import pandas as pd
+from src.load.file_loader import IncrementalCSVLoader
+
+
+def _keys(df: pd.DataFrame) -> np.ndarray:
+    return df["Bank name"].astype(str).to_numpy(dtype=object)
+
+
+def test_consolidated_accepts_column_changing_from_float_to_str(tmp_path):
+    loader = IncrementalCSVLoader(output_dir=tmp_path)
+    float_snapshot = pd.DataFrame({
+        "Bank name": ["A", "B"],
+        "Total assets": [5560.0, 4000.0]
+    })
+    str_snapshot = pd.DataFrame({
+        "Bank name": ["A", "C"],
+        "Total assets": ["5,560.00[2]", "3,100.00"]
+    })
+    
+    loader._update_consolidated(float_snapshot, "banks", "Bank name", _keys(float_snapshot))
+    loader._update_consolidated(str_snapshot, "banks", "Bank name", _keys(str_snapshot))
+    
+    result = pd.read_parquet(tmp_path / "outputs" / "banks_consolidated.parquet")
+    assets_by_bank = dict(zip(result["Bank name"].astype(str), result["Total assets"].astype(str)))
+    assert assets_by_bank == {"A": "5,560.00[2]", "B": "4000.0", "C": "3,100.00"}
+
+
+def test_legacy_csv_migration_accepts_str_snapshot(tmp_path):
+    loader = IncrementalCSVLoader(output_dir=tmp_path)
+    pd.DataFrame({"Bank name": ["A", "B"], "Total assets": [5560.0, 4000.0]}).to_csv(
+        tmp_path / "outputs" / "banks_consolidated.csv", index=False
+    )
+    str_snapshot = pd.DataFrame({"Bank name": ["C"], "Total assets": ["3,100.00[1]"]})
+    
+    loader._update_consolidated(str_snapshot, "banks", "Bank name", _keys(str_snapshot))
+    
+    result = pd.read_parquet(tmp_path / "outputs" / "banks_consolidated.parquet")
+    assert sorted(result["Bank name"].astype(str)) == ["A", "B", "C"]
+
+
+def test_rerun_after_consolidated_failure_recovers_rows(tmp_path, monkeypatch):
+    loader = IncrementalCSVLoader(output_dir=tmp_path)
+    loader.load_incremental(pd.DataFrame({"Bank name": ["A", "B"], "Total assets": [1.0, 2.0]}), "banks")
+    
+    update_consolidated = loader._update_consolidated
+    
+    def failing_update(*args, **kwargs):
+        raise OSError("disk full")
+    
+    day_two = pd.DataFrame({"Bank name": ["A", "B", "C"], "Total assets": [1.0, 2.0, 3.0]})
+    monkeypatch.setattr(loader, "_update_consolidated", failing_update)
+    try:
+        loader.load_incremental(day_two, "banks")
+    except OSError:
+        pass
+    monkeypatch.setattr(loader, "_update_consolidated", update_consolidated)
+    
+    loader.load_incremental(day_two, "banks")
+    
+    result = pd.read_parquet(tmp_path / "outputs" / "banks_consolidated.parquet")
+    assert sorted(result["Bank name"].astype(str)) == ["A", "B", "C"]
+    daily_file = next((tmp_path / "outputs").glob("banks_????-??-??.csv"))
+    assert sorted(pd.read_csv(daily_file)["Bank name"]) == ["A", "B", "C"]
+
+
+def test_rerun_after_keys_index_failure_does_not_duplicate_rows(tmp_path, monkeypatch):
+    loader = IncrementalCSVLoader(output_dir=tmp_path)
+    loader.load_incremental(pd.DataFrame({"Bank name": ["A"], "Total assets": [1.0]}), "banks")
+    
+    save_keys_index = loader._save_keys_index
+    
+    def failing_save(*args, **kwargs):
+        raise OSError("disk full")
+    
+    day_two = pd.DataFrame({"Bank name": ["A", "B"], "Total assets": [1.0, 2.0]})
+    monkeypatch.setattr(loader, "_save_keys_index", failing_save)
+    try:
+        loader.load_incremental(day_two, "banks")
+    except OSError:
+        pass
+    monkeypatch.setattr(loader, "_save_keys_index", save_keys_index)
+    
+    loader.load_incremental(day_two, "banks")
+    
+    daily_file = next((tmp_path / "outputs").glob("banks_????-??-??.csv"))
+    assert list(pd.read_csv(daily_file)["Bank name"]) == ["A", "B"]
+    last_load = orjson.loads((tmp_path / "outputs" / "load_history.json").read_bytes())["loads"][-1]
+    assert last_load["rows_loaded"] == 2
+    assert last_load["new_rows"] == 0
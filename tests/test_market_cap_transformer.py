@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from src.transform.market_cap_transformer import (
+    MarketCapTransformer,
+    select_target_currency,
+)
+
+RATES = {"GBP": 0.8523, "USD": 1.0871}
+
+
+def _banks() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Bank name": ["A", "B", "C"],
+        "Total assets (2025) (US$ billion)": ["5,560.00[2]", "4000", "3,100.4567"]
+    })
+
+
+def _stub_sources(monkeypatch):
+    monkeypatch.setattr(MarketCapTransformer, "_load_banks_data", lambda self: _banks())
+    monkeypatch.setattr(
+        MarketCapTransformer, "_get_exchange_rate",
+        lambda self, target_currency=None: (
+            1.0 if (target_currency or self.target_currency) == self.base_currency
+            else RATES[target_currency or self.target_currency]
+        )
+    )
+
+
+@pytest.mark.parametrize("base", ["EUR", "USD"])
+def test_select_usd_target_matches_transform(monkeypatch, base):
+    _stub_sources(monkeypatch)
+    
+    many = MarketCapTransformer(base, "GBP").transform_many(["GBP", "USD"])
+    for target in ("GBP", "USD"):
+        expected = MarketCapTransformer(base, target).transform()
+        selected = select_target_currency(many, target)
+        
+        assert list(selected.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(
+            selected.drop(columns="_transformed_at"),
+            expected.drop(columns="_transformed_at")
+        )
+
+
+def test_usd_to_usd_rounds_assets(monkeypatch):
+    _stub_sources(monkeypatch)
+    
+    result = MarketCapTransformer("USD", "USD").transform()
+    
+    assert result["assets_usd_billion"].tolist() == [5560.002, 4000.0, 3100.457]
+
+
+def test_clean_numeric_series_matches_scalar_cleaner():
+    # Saídas do antigo _clean_numeric_value (aplicado valor a valor)
+    cases = {
+        "5,560.00[2]": 5560.002,
+        "1,5": 1.5,
+        "-": 0.0,
+        "": 0.0,
+        "1.2.3": 0.0,
+        None: 0.0,
+        "inf": 0.0,
+        "-Infinity": 0.0,
+        "1e5": 15.0,
+        " 12 ": 12.0,
+        4000: 4000.0,
+        2.5: 2.5,
+    }
+    values = pd.Series(list(cases), dtype=object)
+    
+    cleaned = MarketCapTransformer()._clean_numeric_series(values)
+    
+    assert cleaned.dtype == "float64"
+    assert cleaned.tolist() == list(cases.values())
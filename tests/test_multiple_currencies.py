@@ -1,5 +1,6 @@
 # test_multiple_currencies.py
-from src.main import run_etl_pipeline
+from src.main import run_multi_currency_pipeline
+from src.utils.logger import configure_logging
 
 # Testa várias conversões
 conversions = [
@@ -9,13 +10,16 @@ conversions = [
     ("EUR", "GBP"),    # Euro para Libra
 ]
 
-for base, target in conversions:
+if __name__ == "__main__":
+    configure_logging()
+    
     print(f"\n{'='*60}")
-    print(f"Executando conversão: {base} -> {target}")
+    print(f"Executando conversões: {', '.join(f'{b} -> {t}' for b, t in conversions)}")
     print('='*60)
-    
+
     try:
-        df = run_etl_pipeline(base, target)
-        print(f"✓ Sucesso: {len(df)} registros convertidos")
+        results = run_multi_currency_pipeline(conversions)
+        for (base, target), df in results.items():
+            print(f"✓ Sucesso {base} -> {target}: {len(df)} registros convertidos")
     except Exception as e:
-        print(f"✗ Erro: {e}")
\ No newline at end of file
+        print(f"✗ Erro: {e}")